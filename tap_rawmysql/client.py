@@ -5,22 +5,65 @@ This includes RawMysqlStream and RawMysqlConnector.
 
 from __future__ import annotations
 
-import gzip
-import json
+import collections
+import datetime
+import io
 import logging
+import queue
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from decimal import Decimal
 from os import PathLike
-from typing import Any, Iterable, Optional, Union, IO
+from typing import Any, Callable, Deque, Iterable, Optional, Union, IO
 from uuid import UUID, uuid4
 
+import orjson
 import singer_sdk._singerlib as singer
 import sqlalchemy
+from fs.base import FS
+from fs.errors import NoSysPath
+from MySQLdb.cursors import SSCursor
 
 from singer_sdk import SQLConnector, Stream
 from singer_sdk.helpers._batch import BaseBatchFileEncoding, BatchConfig
 from singer_sdk.helpers._typing import conform_record_data_types, TypeConformanceLevel
 from singer_sdk.plugin_base import PluginBase as TapBaseClass
 
+try:
+    from isal.igzip import IGzipFile as GzipFile
+except ImportError:
+    from gzip import GzipFile
+
+try:
+    import pyarrow
+    import pyarrow.json
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Batch files are intermediate artifacts, so favour throughput over size.
+BATCH_COMPRESSLEVEL = 1
+# Coalesce small compressed writes before they reach the (possibly remote) fs.
+BATCH_BUFFER_SIZE = 4 * 1024 * 1024
+# Number of serialized records handed to the compressor in a single write.
+BATCH_WRITE_ROWS = 1024
+# Maximum number of fetched records waiting to be written.
+BATCH_QUEUE_SIZE = 4096
+
+# Each record becomes one newline-terminated line; dates/times are passed to
+# `_json_default` so they are formatted the way the SDK formats them.
+_JSONL_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_PASSTHROUGH_DATETIME
+
+# Queued by the record producer once the stream is exhausted.
+_END_OF_STREAM = object()
+
 
 class RawMysqlConnector(SQLConnector):
     """Connects to the rawmysql SQL source."""
@@ -53,6 +96,20 @@ class RawMysqlConnector(SQLConnector):
 
         return connection_url
 
+    def create_engine(self) -> sqlalchemy.engine.Engine:
+        """Return a new engine for this connector.
+
+        Streams sync one at a time and share a single connector, so one pooled
+        connection is enough; it is pinged before reuse in case the server
+        dropped it between streams.
+
+        Returns:
+            A new SQLAlchemy Engine.
+        """
+        return sqlalchemy.create_engine(
+            self.sqlalchemy_url, echo=False, pool_size=1, pool_pre_ping=True
+        )
+
     @staticmethod
     def to_jsonschema_type(
         from_type: str
@@ -100,19 +157,173 @@ def conform_record_data_types_and_uuid(  # noqa: C901
 
     Any property names not found in the schema catalog will be removed, and a
     warning will be logged exactly once per unmapped property name.
+
+    Only needed for schemas with nested values or records with unmapped
+    properties; other values are converted by `_json_default` when the
+    record is serialized.
     """
-    rec = conform_record_data_types(
+    return conform_record_data_types(
         stream_name=stream_name, record=record, schema=schema, level=TypeConformanceLevel.RECURSIVE, logger=logger
     )
 
-    # Fix any UUIDs as well
-    for property_name, elem in record.items():
-        if isinstance(elem, UUID):
-            rec[property_name] = str(elem)
-        elif isinstance(elem, Decimal):
-            rec[property_name] = float(elem)
 
-    return rec
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Serialized as strings even when the schema says boolean.
+_TEMPORAL_TYPES = (datetime.date, datetime.time, datetime.timedelta)
+
+
+def _datetime_to_json(obj: datetime.datetime) -> str:
+    if obj.tzinfo is None:
+        obj = obj.replace(tzinfo=datetime.timezone.utc)
+    return obj.isoformat()
+
+
+def _date_to_json(obj: datetime.date) -> str:
+    return obj.isoformat() + "T00:00:00+00:00"
+
+
+def _timedelta_to_json(obj: datetime.timedelta) -> str:
+    return (_EPOCH + obj).isoformat()
+
+
+# Serializers for the values orjson hands to `_json_default`. The output
+# matches the SDK's type conformance. `datetime` must precede `date`, since it
+# is a subclass of it.
+_JSON_SERIALIZERS: dict[type, Callable[[Any], Any]] = {
+    Decimal: float,
+    UUID: str,
+    datetime.datetime: _datetime_to_json,
+    datetime.date: _date_to_json,
+    datetime.time: str,
+    datetime.timedelta: _timedelta_to_json,
+    bytes: bytes.hex,
+}
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize values orjson does not handle natively."""
+    serializer = _JSON_SERIALIZERS.get(type(obj))
+    if serializer is not None:
+        return serializer(obj)
+
+    # Subclasses, e.g. pendulum.DateTime
+    for cls, serializer in _JSON_SERIALIZERS.items():
+        if isinstance(obj, cls):
+            return serializer(obj)
+
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _conform_booleans(
+    record: dict[str, Any], boolean_properties: tuple[str, ...]
+) -> dict[str, Any]:
+    """Coerce values of boolean properties in place, as the SDK would."""
+    for property_name in boolean_properties:
+        elem = record.get(property_name)
+        if elem is None:
+            continue
+        if type(elem) is bytes:
+            record[property_name] = elem != b"\x00"
+        elif not isinstance(elem, _TEMPORAL_TYPES):
+            record[property_name] = elem != 0
+
+    return record
+
+
+def _to_arrow_schema(schema: dict, unsigned: frozenset) -> pyarrow.Schema:
+    """Return the Arrow schema used to parse a stream's JSON Lines into Parquet.
+
+    Nested properties are left out so that their types are inferred. Integers
+    are int64, or uint64 for the `unsigned` columns, so a BIGINT UNSIGNED
+    value above 2**63 - 1 still fits.
+    """
+    fields = []
+    for name, property_schema in schema["properties"].items():
+        types = property_schema.get("type", ())
+        if "array" in types or "object" in types:
+            continue
+        if "integer" in types:
+            arrow_type = pyarrow.uint64() if name in unsigned else pyarrow.int64()
+        elif "number" in types:
+            arrow_type = pyarrow.float64()
+        elif "boolean" in types:
+            arrow_type = pyarrow.bool_()
+        else:
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(name, arrow_type))
+
+    return pyarrow.schema(fields)
+
+
+def _open_batch_file(fs: FS, filename: str) -> IO:
+    """Open a batch file for writing behind a `BATCH_BUFFER_SIZE` buffer.
+
+    Files on local storage are opened directly by path, so the buffer is
+    flushed straight to the OS file instead of through the fs wrapper's own
+    buffered file object.
+    """
+    try:
+        syspath = fs.getsyspath(filename)
+    except NoSysPath:
+        return io.BufferedWriter(
+            fs.open(filename, "wb"), buffer_size=BATCH_BUFFER_SIZE
+        )
+
+    return open(syspath, "wb", buffering=BATCH_BUFFER_SIZE)
+
+
+def _compress_batch_file(f: IO, compression: Optional[str]) -> IO:
+    """Wrap an open batch file in a gzip or zstd compressing writer."""
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=BATCH_COMPRESSLEVEL).stream_writer(f)
+
+    return GzipFile(fileobj=f, mode="wb", compresslevel=BATCH_COMPRESSLEVEL)
+
+
+def _finalize_batch_file(
+    fs: FS, filename: str, f: IO, writer: IO, lines: list[bytes]
+) -> str:
+    """Flush and close a batch file, returning its URL."""
+    writer.write(b"".join(lines))
+    writer.close()
+    f.close()
+    return fs.geturl(filename)
+
+
+def _write_parquet_batch_file(
+    fs: FS,
+    filename: str,
+    lines: list[bytes],
+    arrow_schema: pyarrow.Schema,
+    compression: Optional[str],
+) -> str:
+    """Write serialized records to a Parquet file, returning its URL.
+
+    The JSON Lines written for the jsonl format are parsed by Arrow, so values
+    are identical in both formats.
+    """
+    data = b"".join(lines)
+    table = pyarrow.json.read_json(
+        pyarrow.BufferReader(data),
+        read_options=pyarrow.json.ReadOptions(
+            block_size=max(BATCH_BUFFER_SIZE, max(map(len, lines)))
+        ),
+        parse_options=pyarrow.json.ParseOptions(explicit_schema=arrow_schema),
+    )
+    with _open_batch_file(fs, filename) as f:
+        pyarrow.parquet.write_table(
+            table, f, row_group_size=len(lines), compression=compression or "zstd"
+        )
+
+    return fs.geturl(filename)
+
+
+@dataclass
+class ParquetEncoding(BaseBatchFileEncoding):
+    """Parquet encoding for batch files."""
+
+    __encoding_format__ = "parquet"
 
 
 class RawMysqlStream(Stream):
@@ -135,6 +346,55 @@ class RawMysqlStream(Stream):
         self.replication_key = stream_config.get("replication_key", None)
         self.batch_size = self.config.get("batch_size", 100_000)
 
+        # Nested values still go through the SDK's recursive type conformance.
+        # Everything else is serialized by `_json_default`, leaving only the
+        # boolean properties, usually none, to be touched per record.
+        properties = self.schema["properties"]
+        self._nested_schema = any(
+            "array" in p.get("type", ()) or "object" in p.get("type", ())
+            for p in properties.values()
+        )
+        self._boolean_properties = tuple(
+            name for name, p in properties.items() if "boolean" in p.get("type", ())
+        )
+
+    def _produce_records(
+        self,
+        context: Optional[dict],
+        records: queue.Queue,
+        resume: threading.Event,
+        stop: threading.Event,
+    ) -> None:
+        """Feed synced records to `get_batches` from a background thread.
+
+        A `None` is queued after every `batch_size` records and the thread then
+        waits for `resume`, so stream state never runs ahead of the batches
+        that have been emitted.
+        """
+        chunk_size = 0
+        batch_size = self.batch_size
+        sync_records = self._sync_records(context, write_messages=False)
+        try:
+            for record in sync_records:
+                records.put(record)
+                if stop.is_set():
+                    return
+
+                chunk_size += 1
+                if chunk_size >= batch_size:
+                    records.put(None)
+                    resume.wait()
+                    resume.clear()
+                    if stop.is_set():
+                        return
+                    chunk_size = 0
+
+            records.put(_END_OF_STREAM)
+        except BaseException as ex:  # noqa: BLE001
+            records.put(ex)
+        finally:
+            sync_records.close()
+
     def get_batches(
         self,
         batch_config: BatchConfig,
@@ -145,6 +405,11 @@ class RawMysqlStream(Stream):
         Developers are encouraged to override this method to customize batching
         behavior for databases, bulk APIs, etc.
 
+        Records are fetched by a background thread while this one serializes,
+        compresses and writes them. Finished files are closed on a small
+        thread pool. Batches are written as gzip or zstd compressed JSON Lines,
+        or as Parquet when the encoding format is `parquet`.
+
         Args:
             batch_config: Batch config for this stream.
             context: Stream partition or context dictionary.
@@ -156,52 +421,150 @@ class RawMysqlStream(Stream):
         prefix = batch_config.storage.prefix or ""
 
         i = 1
-        chunk_size = 0
         filename: Optional[str] = None
         f: Optional[IO] = None
-        gz: Optional[gzip.GzipFile] = None
-
-        with batch_config.storage.fs() as fs:
-            for record in self._sync_records(context, write_messages=False):
-                if filename is None or f is None or gz is None:
-                    filename = f"{prefix}{sync_id}-{i}.json.gz"
-                    f = fs.open(filename, "wb")
-                    gz = gzip.GzipFile(fileobj=f, mode="wb")
-
-                record = conform_record_data_types_and_uuid(
-                    stream_name=self.name,
-                    record=record,
-                    schema=self.schema,
-                    logger=self.logger,
+        writer: Optional[IO] = None
+        lines: list[bytes] = []
+
+        # Bound once here rather than looked up on every record.
+        stream_name = self.name
+        schema = self.schema
+        logger = self.logger
+        conform = conform_record_data_types_and_uuid
+        nested_schema = self._nested_schema
+        boolean_properties = self._boolean_properties
+        properties = schema["properties"].keys()
+        encoding = batch_config.encoding
+        dumps = orjson.dumps
+
+        parquet = encoding.format == ParquetEncoding.__encoding_format__
+        if parquet:
+            if pyarrow is None:
+                raise RuntimeError(
+                    "The 'parquet' batch format requires pyarrow; "
+                    "install tap-rawmysql with the 'parquet' extra."
                 )
+            arrow_schema = _to_arrow_schema(
+                schema,
+                frozenset(
+                    column["name"]
+                    for column in self.stream_config["columns"]
+                    if "unsigned" in column["type"].lower()
+                ),
+            )
+            suffix = ".parquet"
+        elif encoding.compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError(
+                    "The 'zstd' batch compression requires zstandard; "
+                    "install tap-rawmysql with the 'zstd' extra."
+                )
+            suffix = ".json.zst"
+        else:
+            suffix = ".json.gz"
+
+        def finalize() -> Future:
+            if filename is None:
+                raise ValueError("'filename' was None but shouldn't have been")
+            if parquet:
+                return pool.submit(
+                    _write_parquet_batch_file,
+                    fs,
+                    filename,
+                    lines,
+                    arrow_schema,
+                    encoding.compression,
+                )
+            if writer is None:
+                raise ValueError("'writer' was None but shouldn't have been")
+            if f is None:
+                raise ValueError("'f' was None but shouldn't have been")
+            return pool.submit(_finalize_batch_file, fs, filename, f, writer, lines)
+
+        records: queue.Queue = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+        resume = threading.Event()
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce_records,
+            args=(context, records, resume, stop),
+            daemon=True,
+        )
+        producer.start()
+
+        # Without a replication key, stream state does not depend on how far
+        # the producer has read, so it may start on the next batch while the
+        # previous file is still being closed and uploaded. At most one file
+        # is closing at a time, so open handles and buffered batches stay
+        # bounded when the fs is slower than the database.
+        overlap = not self.replication_key
+        pending: Deque[Future] = collections.deque()
+
+        try:
+            with batch_config.storage.fs() as fs, ThreadPoolExecutor(
+                max_workers=2
+            ) as pool:
+                while True:
+                    while pending and pending[0].done():
+                        yield encoding, [pending.popleft().result()]
+
+                    record = records.get()
+                    if record is _END_OF_STREAM:
+                        break
+                    if isinstance(record, BaseException):
+                        # Report the batches already written before failing.
+                        while pending:
+                            yield encoding, [pending.popleft().result()]
+                        raise record
+
+                    if record is None:
+                        if pending:
+                            yield encoding, [pending.popleft().result()]
+                        pending.append(finalize())
+                        filename = None
+                        f = None
+                        writer = None
+                        lines = []
+
+                        i += 1
+                        if not overlap:
+                            yield encoding, [pending.popleft().result()]
+                        resume.set()
+                        continue
+
+                    if filename is None:
+                        filename = f"{prefix}{sync_id}-{i}{suffix}"
+                        if not parquet:
+                            f = _open_batch_file(fs, filename)
+                            writer = _compress_batch_file(f, encoding.compression)
+
+                    if nested_schema or not record.keys() <= properties:
+                        record = conform(stream_name, record, schema, logger)
+                    elif boolean_properties:
+                        record = _conform_booleans(record, boolean_properties)
+
+                    lines.append(
+                        dumps(record, default=_json_default, option=_JSONL_OPTIONS)
+                    )
 
-                gz.write((json.dumps(record) + "\n").encode())
-                chunk_size += 1
-
-                if chunk_size >= self.batch_size:
-                    gz.close()
-                    gz = None
-                    f.close()
-                    f = None
-                    file_url = fs.geturl(filename)
-                    yield batch_config.encoding, [file_url]
-
-                    filename = None
-
-                    i += 1
-                    chunk_size = 0
-
-            if chunk_size > 0:
-                if gz is None:
-                    raise ValueError("'gz' was None but shouldn't have been")
-                if f is None:
-                    raise ValueError("'f' was None but shouldn't have been")
-                if filename is None:
-                    raise ValueError("'filename' was None but shouldn't have been")
-                gz.close()
-                f.close()
-                file_url = fs.geturl(filename)
-                yield batch_config.encoding, [file_url]
+                    # Parquet files are built from the whole batch at once.
+                    if writer is not None and len(lines) >= BATCH_WRITE_ROWS:
+                        writer.write(b"".join(lines))
+                        lines.clear()
+
+                while pending:
+                    yield encoding, [pending.popleft().result()]
+
+                if filename is not None:
+                    yield encoding, [finalize().result()]
+        finally:
+            # Unblock the producer if we stopped early, then let it wind down.
+            stop.set()
+            resume.set()
+            while producer.is_alive():
+                try:
+                    records.get(timeout=0.1)
+                except queue.Empty:
+                    pass
 
     def get_records(self, context: Optional[dict]) -> Iterable[dict[str, Any]]:
         """Return a generator of record-type dictionary objects.
@@ -256,8 +619,29 @@ class RawMysqlStream(Stream):
 
                 multiparams = [{"rep_key_val": rep_key_val}]
 
-        for record in self.connector.connection.execute(
-            sqlalchemy.text(sql),
-            *multiparams,
-        ).mappings():
-            yield dict(record)
+        connection = self.connector.connection
+
+        # Compile the statement so `:rep_key_val` style binds still work
+        # against the DBAPI cursor's paramstyle.
+        compiled = sqlalchemy.text(sql).compile(dialect=connection.dialect)
+        params: Any = compiled.construct_params(multiparams[0] if multiparams else None)
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+
+        # Use an unbuffered cursor so rows are streamed like `stream_results`,
+        # fetching them from the server in chunks of `arraysize`.
+        cursor = connection.connection.cursor(SSCursor)
+        cursor.arraysize = max(1, self.batch_size // 10)
+        try:
+            cursor.execute(str(compiled), params)
+            cols = tuple(sys.intern(c[0]) for c in cursor.description)
+            rows = cursor.fetchmany()
+            while rows:
+                # Records have to be dicts: the SDK reads a yielded tuple as
+                # (record, child_context) and tracks state from record values.
+                for row in rows:
+                    yield dict(zip(cols, row))
+                rows = cursor.fetchmany()
+        finally:
+            cursor.close()
+            connection.close()
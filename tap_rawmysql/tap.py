@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import copy
+import functools
+import hashlib
+import json
 from pathlib import PurePath
 from typing import Dict, Optional, List, Tuple, Any, Union
 
@@ -15,6 +19,51 @@ from singer_sdk.streams.sql import SQLConnector
 from tap_rawmysql.client import RawMysqlConnector, RawMysqlStream
 
 
+# NOTE: This is an ordered mapping, with earlier mappings taking precedence.
+#       If the SQL-provided type contains the type name on the left, the mapping
+#       will return the respective singer type. Names are kept lowercase.
+_SQLTYPE_LOOKUP: tuple[tuple[str, dict], ...] = (
+    ("timestamp", th.DateTimeType.type_dict),
+    ("datetime", th.DateTimeType.type_dict),
+    ("date", th.DateType.type_dict),
+    ("int", th.IntegerType.type_dict),
+    ("number", th.NumberType.type_dict),
+    ("decimal", th.NumberType.type_dict),
+    ("double", th.NumberType.type_dict),
+    ("float", th.NumberType.type_dict),
+    ("string", th.StringType.type_dict),
+    ("text", th.StringType.type_dict),
+    ("char", th.StringType.type_dict),
+    ("bool", th.BooleanType.type_dict),
+    ("variant", th.StringType.type_dict),
+    # User Add type
+    ("time", th.TimeType.type_dict),
+    ("multipleof", th.NumberType.type_dict),  # decimal
+    ("object", th.StringType.type_dict),
+)
+
+# Bare type names (e.g. "int", "timestamp") resolve without scanning.
+_SQLTYPE_EXACT: dict[str, dict] = dict(_SQLTYPE_LOOKUP)
+
+_STRING_TYPE_DICT: dict = th.StringType.type_dict
+
+
+@functools.lru_cache(maxsize=256)
+def _jsonschema_type_for_name(type_name: str) -> dict:
+    """Return the JSON Schema dict for a SQL type name, memoized per name."""
+    name_l = type_name.lower()
+    jsonschema_type = _SQLTYPE_EXACT.get(name_l)
+    if jsonschema_type is not None:
+        return jsonschema_type
+
+    # Look for the type name within the known SQL type names:
+    for sqltype, jsonschema_type in _SQLTYPE_LOOKUP:
+        if sqltype in name_l:
+            return jsonschema_type
+
+    return _STRING_TYPE_DICT  # safe failover to str
+
+
 class TapRawMysql(Tap):
     """TapRawMysql tap class."""
 
@@ -22,6 +71,12 @@ class TapRawMysql(Tap):
 
     _tap_connection: Optional[sqlalchemy.engine.Connection] = None
 
+    _connector: Optional[RawMysqlConnector] = None
+
+    # Parsed catalog entries, keyed by a digest of database + stream config.
+    # Each subclass gets its own, as it may map column types differently.
+    _schema_cache: Dict[str, Dict[str, Any]] = {}
+
     default_stream_class = RawMysqlConnector
 
     config_jsonschema = th.PropertiesList(
@@ -136,6 +191,10 @@ class TapRawMysql(Tap):
         ),
     ).to_dict()
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._schema_cache = {}
+
     def __init__(
         self,
         config: Optional[Union[dict, PurePath, str, List[Union[PurePath, str]]]] = None,
@@ -153,6 +212,20 @@ class TapRawMysql(Tap):
         self._own_connection = connection
 
     def parse_raw_sql_stream(self, stream_config: dict) -> Dict[str, Any]:
+        key = hashlib.blake2b(
+            json.dumps(
+                [self.config["database"], stream_config], sort_keys=True
+            ).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+        if key not in self._schema_cache:
+            self._schema_cache[key] = self._build_raw_sql_catalog_entry(stream_config)
+
+        # Hand out a copy; streams and the SDK may modify what they are given.
+        return copy.deepcopy(self._schema_cache[key])
+
+    def _build_raw_sql_catalog_entry(self, stream_config: dict) -> Dict[str, Any]:
         unique_stream_id = SQLConnector.get_fully_qualified_name(
             db_name=self.config["database"],
             table_name=stream_config["name"],
@@ -218,11 +291,12 @@ class TapRawMysql(Tap):
         """
         result: Dict[str, Stream] = {}
 
-        connector = (
-            RawMysqlConnector(connection=self._tap_connection)
-            if self._tap_connection
-            else None
-        )
+        # One connector (and so one engine/pool) is shared by every stream.
+        if self._connector is None:
+            self._connector = RawMysqlConnector(
+                config=dict(self.config), connection=self._tap_connection
+            )
+        connector = self._connector
 
         for catalog_entry, stream_config in self.discover_raw_sql_streams():
             s = RawMysqlStream(
@@ -257,34 +331,6 @@ class TapRawMysql(Tap):
         Returns:
             A compatible JSON Schema type definition.
         """
-        sqltype_lookup: dict[str, dict] = {
-            # NOTE: This is an ordered mapping, with earlier mappings taking precedence.
-            #       If the SQL-provided type contains the type name on the left, the mapping
-            #       will return the respective singer type.
-            "timestamp": th.DateTimeType.type_dict,
-            "datetime": th.DateTimeType.type_dict,
-            "date": th.DateType.type_dict,
-            "int": th.IntegerType.type_dict,
-            "number": th.NumberType.type_dict,
-            "decimal": th.NumberType.type_dict,
-            "double": th.NumberType.type_dict,
-            "float": th.NumberType.type_dict,
-            "string": th.StringType.type_dict,
-            "text": th.StringType.type_dict,
-            "char": th.StringType.type_dict,
-            "bool": th.BooleanType.type_dict,
-            "variant": th.StringType.type_dict,
-        }
-
-        sqltype_lookup.update(
-            # User Add type
-            {
-                "time": th.TimeType.type_dict,
-                "multipleOf": th.NumberType.type_dict, # decimal
-                "object": th.StringType.type_dict,
-            }
-        )
-
         if isinstance(from_type, str):
             type_name = from_type
         elif isinstance(from_type, sqlalchemy.types.TypeEngine):
@@ -298,12 +344,8 @@ class TapRawMysql(Tap):
             msg = "Expected `str` or a SQLAlchemy `TypeEngine` object or type."
             raise ValueError(msg)
 
-        # Look for the type name within the known SQL type names:
-        for sqltype, jsonschema_type in sqltype_lookup.items():
-            if sqltype.lower() in type_name.lower():
-                return jsonschema_type
-
-        return sqltype_lookup["string"]  # safe failover to str
+        # Return a copy so callers can't alter the memoized definition.
+        return copy.deepcopy(_jsonschema_type_for_name(type_name))
 
 
 if __name__ == "__main__":
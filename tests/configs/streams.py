@@ -50,23 +50,23 @@ TEST_INTEGER_TYPE_STREAM = dict(
                 },
                 {
                     "name": "tinyint_unsigned_col",
-                    "type": "int"
+                    "type": "tinyint unsigned"
                 },
                 {
                     "name": "smallint_unsigned_col",
-                    "type": "int"
+                    "type": "smallint unsigned"
                 },
                 {
                     "name": "mediumint_unsigned_col",
-                    "type": "int"
+                    "type": "mediumint unsigned"
                 },
                 {
                     "name": "int_unsigned_col",
-                    "type": "int"
+                    "type": "int unsigned"
                 },
                 {
                     "name": "bigint_unsigned_col",
-                    "type": "int"
+                    "type": "bigint unsigned"
                 },
             ]
         }
@@ -0,0 +1,19 @@
+"""Shared fixtures for tap-rawmysql tests."""
+import pytest
+
+from tap_rawmysql.tap import TapRawMysql
+
+
+@pytest.fixture(scope="session")
+def tap_factory():
+    """Return a function building one TapRawMysql per config for the whole session."""
+    cache = {}
+
+    def make(config):
+        key = id(config)
+        if key not in cache:
+            # Keep the config alive so its id can't be reused by another dict.
+            cache[key] = (config, TapRawMysql(config))
+        return cache[key][1]
+
+    return make
@@ -1,159 +1,265 @@
-import gzip
-import json
+import contextlib
+import itertools
+import mmap
 import os
-import shutil
+import threading
+from datetime import date, datetime, timedelta
 from urllib.parse import urlparse
+from urllib.request import url2pathname
 
+import orjson
+import pyarrow
+import pyarrow.parquet
+import pytest
+import rapidgzip
+import zstandard
+
+from tap_rawmysql import client
 from tap_rawmysql.tap import TapRawMysql
 from tests.configs import streams
 
-
-def test_integer_type():
-    """Run standard tap tests from the SDK."""
-    CONFIG = streams.TEST_INTEGER_TYPE_STREAM
-    tap = TapRawMysql(CONFIG)
-
-    catalog = tap.catalog.to_dict()
-
-    for stream in catalog["streams"]:
-        assert stream["schema"]["properties"]["tinyint_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["smallint_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["mediumint_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["int_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["bigint_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["tinyint_unsigned_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["smallint_unsigned_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["mediumint_unsigned_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["int_unsigned_col"]["type"] == ["integer", "null"]
-        assert stream["schema"]["properties"]["bigint_unsigned_col"]["type"] == ["integer", "null"]
-
-
-def test_fixed_point_type():
-    """Run standard tap tests from the SDK."""
-    CONFIG = streams.TEST_FIXED_POINT_TYPE_STREAM
-    tap = TapRawMysql(CONFIG)
-
-    catalog = tap.catalog.to_dict()
-
-    for stream in catalog["streams"]:
-        assert stream["schema"]["properties"]["decimal_min_scale_col"]["type"] == ["number", "null"]
-        assert stream["schema"]["properties"]["decimal_max_scale_col"]["type"] == ["number", "null"]
-        assert stream["schema"]["properties"]["float_col"]["type"] == ["number", "null"]
-        assert stream["schema"]["properties"]["double_col"]["type"] == ["number", "null"]
-
-
-def test_date_type():
+@contextlib.contextmanager
+def open_batch_file(path):
+    """Open a gzip or zstd compressed batch file for reading.
+
+    Gzip files are decompressed in parallel by rapidgzip, which reads the file
+    itself. Zstd files are memory-mapped and decompressed straight from the
+    mapping.
+    """
+    if not path.endswith(".zst"):
+        with rapidgzip.open(path, parallelization=os.cpu_count()) as reader:
+            yield reader
+        return
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with zstandard.ZstdDecompressor().stream_reader(mm, closefd=False) as reader:
+            yield reader
+
+
+def read_batch_file(url):
+    """Return the records of a JSON Lines or Parquet batch file."""
+    path = url2pathname(urlparse(url).path)
+    if path.endswith(".parquet"):
+        return pyarrow.parquet.read_table(path).to_pylist()
+
+    with open_batch_file(path) as batch:
+        data = batch.read()
+    return [orjson.loads(line) for line in data.splitlines()]
+
+
+_INTEGER_NULL = ["integer", "null"]
+_NUMBER_NULL = ["number", "null"]
+_STRING_NULL = ["string", "null"]
+_BOOLEAN_NULL = ["boolean", "null"]
+
+EXPECTED_INTEGER_TYPES = dict.fromkeys(
+    (
+        "tinyint_col",
+        "smallint_col",
+        "mediumint_col",
+        "int_col",
+        "bigint_col",
+        "tinyint_unsigned_col",
+        "smallint_unsigned_col",
+        "mediumint_unsigned_col",
+        "int_unsigned_col",
+        "bigint_unsigned_col",
+    ),
+    _INTEGER_NULL,
+)
+
+EXPECTED_FIXED_POINT_TYPES = dict.fromkeys(
+    ("decimal_min_scale_col", "decimal_max_scale_col", "float_col", "double_col"),
+    _NUMBER_NULL,
+)
+
+EXPECTED_DATE_TYPES = dict.fromkeys(
+    ("timestamp_col", "date_col", "datetime_col", "time_col"), _STRING_NULL
+)
+
+EXPECTED_STRING_TYPES = dict.fromkeys(
+    ("varchar_col", "char_col", "text_col"), _STRING_NULL
+)
+
+EXPECTED_ETC_TYPES = {
+    "json_col": _STRING_NULL,
+    "bool_col": _BOOLEAN_NULL,
+}
+
+EXPECTED_BATCH = [
+    {
+        'timestamp_col': '2023-07-24T01:12:34+00:00',
+        'date_col': '2023-07-24T00:00:00+00:00',
+        'datetime_col': '2023-07-24T01:12:34+00:00',
+        'time_col': '1970-01-01T01:12:34+00:00'
+    },
+    {
+        'timestamp_col': '2023-07-24T01:12:34+00:00',
+        'date_col': None,
+        'datetime_col': None,
+        'time_col': None
+    },
+    {
+        'timestamp_col': None,
+        'date_col': '2023-07-24T00:00:00+00:00',
+        'datetime_col': None,
+        'time_col': None
+    },
+    {
+        'timestamp_col': None,
+        'date_col': None,
+        'datetime_col': '2023-07-24T01:12:34+00:00',
+        'time_col': None
+    },
+    {
+        'timestamp_col': None,
+        'date_col': None,
+        'datetime_col': None,
+        'time_col': '1970-01-01T01:12:34+00:00'
+    },
+]
+
+
+@pytest.fixture
+def catalog_dict(request, tap_factory):
+    """Return the discovered catalog of the tap built from `request.param`."""
+    return tap_factory(request.param).catalog.to_dict()
+
+
+@pytest.mark.parametrize(
+    "catalog_dict, expected",
+    [
+        (streams.TEST_INTEGER_TYPE_STREAM, EXPECTED_INTEGER_TYPES),
+        (streams.TEST_FIXED_POINT_TYPE_STREAM, EXPECTED_FIXED_POINT_TYPES),
+        (streams.TEST_DATE_TYPE_STREAM, EXPECTED_DATE_TYPES),
+        (streams.TEST_STRING_TYPE_STREAM, EXPECTED_STRING_TYPES),
+        (streams.TEST_ETC_TYPE_STREAM, EXPECTED_ETC_TYPES),
+    ],
+    ids=["integer", "fixed_point", "date", "string", "etc"],
+    indirect=["catalog_dict"],
+)
+def test_schema_types(catalog_dict, expected):
+    """Check the JSON schema types discovered for each column."""
+    assert len(catalog_dict) == 1
+
+    for stream in catalog_dict["streams"]:
+        props = stream["schema"]["properties"]
+        assert {k: props[k]["type"] for k in expected} == expected
+
+
+def test_jsonschema_type_is_copied():
+    """Mutating a returned type definition must not leak into later lookups."""
+    TapRawMysql.to_jsonschema_type("int")["type"].append("null")
+
+    assert TapRawMysql.to_jsonschema_type("int") == {"type": ["integer"]}
+    assert TapRawMysql.to_jsonschema_type("bigint") == {"type": ["integer"]}
+
+
+def test_schema_cache_is_per_class():
+    """A subclass mapping types differently does not reuse cached entries."""
+    class StringTap(TapRawMysql):
+        @staticmethod
+        def to_jsonschema_type(from_type):
+            return {"type": ["string"]}
+
+    TapRawMysql(streams.TEST_INTEGER_TYPE_STREAM)
+    tap = StringTap(streams.TEST_INTEGER_TYPE_STREAM)
+
+    props = tap.catalog.to_dict()["streams"][0]["schema"]["properties"]
+    assert props["int_col"]["type"] == ["string", "null"]
+
+
+def test_date_type(tap_factory):
     """Run standard tap tests from the SDK."""
     CONFIG = streams.TEST_DATE_TYPE_STREAM
 
-    tap = TapRawMysql(CONFIG)
+    # MySQLdb returns TIME columns as timedelta.
+    TS = datetime(2023, 7, 24, 1, 12, 34)
+    D = date(2023, 7, 24)
+    T = timedelta(hours=1, minutes=12, seconds=34)
 
-    catalog = tap.catalog.to_dict()
+    tap = tap_factory(CONFIG)
 
-    for stream in catalog["streams"]:
-        assert stream["schema"]["properties"]["timestamp_col"]["type"] == ["string", "null"]
-        assert stream["schema"]["properties"]["date_col"]["type"] == ["string", "null"]
-        assert stream["schema"]["properties"]["datetime_col"]["type"] == ["string", "null"]
-        assert stream["schema"]["properties"]["time_col"]["type"] == ["string", "null"]
-
-    for _, stream in tap.streams.items():
-        records = list(stream.get_records(context=None))
+    for stream in tap.streams.values():
+        records = list(itertools.islice(stream.get_records(context=None), 5))
 
         assert len(records) == 5
-        assert str(records[0]['timestamp_col']) == '2023-07-24 01:12:34'
-        assert str(records[0]['date_col']) == '2023-07-24'
-        assert str(records[0]['datetime_col']) == '2023-07-24 01:12:34'
-        assert str(records[0]['time_col']) == '1:12:34'
+        assert sum(1 for _ in stream.get_records(context=None)) == 5
+        assert records[0]['timestamp_col'] == TS
+        assert records[0]['date_col'] == D
+        assert records[0]['datetime_col'] == TS
+        assert records[0]['time_col'] == T
 
-        assert str(records[1]['timestamp_col']) == '2023-07-24 01:12:34'
+        assert records[1]['timestamp_col'] == TS
         assert records[1]['date_col'] == None
         assert records[1]['datetime_col'] == None
         assert records[1]['time_col'] == None
 
         assert records[2]['timestamp_col'] == None
-        assert str(records[2]['date_col']) == '2023-07-24'
+        assert records[2]['date_col'] == D
         assert records[2]['datetime_col'] == None
         assert records[2]['time_col'] == None
 
         assert records[3]['timestamp_col'] == None
         assert records[3]['date_col'] == None
-        assert str(records[3]['datetime_col']) == '2023-07-24 01:12:34'
+        assert records[3]['datetime_col'] == TS
         assert records[3]['time_col'] == None
 
         assert records[4]['timestamp_col'] == None
         assert records[4]['date_col'] == None
         assert records[4]['datetime_col'] == None
-        assert str(records[4]['time_col']) == '1:12:34'
+        assert records[4]['time_col'] == T
 
 
-def test_string_type():
+def test_string_type(tap_factory):
     """Run standard tap tests from the SDK."""
     CONFIG = streams.TEST_STRING_TYPE_STREAM
 
-    tap = TapRawMysql(CONFIG)
-
-    catalog = tap.catalog.to_dict()
-    assert len(catalog) == 1
-
-    catalog_stream = catalog["streams"][0]
+    tap = tap_factory(CONFIG)
 
-    assert catalog_stream["schema"]["properties"]["varchar_col"]["type"] == ["string", "null"]
-    assert catalog_stream["schema"]["properties"]["char_col"]["type"] == ["string", "null"]
-    assert catalog_stream["schema"]["properties"]["text_col"]["type"] == ["string", "null"]
+    assert len(tap.streams) == 1
+    stream = next(iter(tap.streams.values()))
 
-    stream = tap.streams.values()
-    assert len(stream) == 1
+    assert sum(1 for _ in stream.get_records(context=None)) == 4
 
-    for _, stream in tap.streams.items():
-        records = list(stream.get_records(context=None))
-        assert len(records) == 4
+    # check just first row
+    record = next(stream.get_records(context=None))
+    assert len(record['char_col']) == 255
+    assert len(record['varchar_col']) == 1000
+    assert len(record['text_col']) == 65535
 
-        # check just first row
-        assert len(records[0]['char_col']) == 255
-        assert len(records[0]['varchar_col']) == 1000
-        assert len(records[0]['text_col']) == 65535
 
-
-def test_etc_type():
+def test_etc_type(tap_factory):
     CONFIG = streams.TEST_ETC_TYPE_STREAM
 
-    tap = TapRawMysql(CONFIG)
-
-    catalog = tap.catalog.to_dict()
-    assert len(catalog) == 1
-
-    stream = catalog["streams"][0]
-
-    assert stream["schema"]["properties"]["json_col"]["type"] == ["string", "null"]
-    assert stream["schema"]["properties"]["bool_col"]["type"] == ["boolean", "null"]
+    tap = tap_factory(CONFIG)
 
-    stream = tap.streams.values()
-    assert len(stream) == 1
+    assert len(tap.streams) == 1
+    stream = next(iter(tap.streams.values()))
 
-    for _, stream in tap.streams.items():
-        records = list(stream.get_records(context=None))
+    records = list(stream.get_records(context=None))
 
 
-def test_batch_type():
+@pytest.mark.parametrize(
+    "encoding_format, compression",
+    [("jsonl", "gzip"), ("jsonl", "zstd"), ("parquet", "zstd")],
+)
+def test_batch_type(tap_factory, tmp_path, encoding_format, compression):
     """Run standard tap tests from the SDK."""
-    CONFIG = streams.TEST_DATE_TYPE_STREAM
-
-    storage_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
-    storage = os.path.join(storage_directory, "test_batch_type")
-    os.makedirs(storage, exist_ok=True)
+    storage = str(tmp_path)
 
     batch_dict = dict(
         batch_size=10000,
         batch_config={
-            "encoding": {"format": "jsonl", "compression": "gzip"},
+            "encoding": {"format": encoding_format, "compression": compression},
             "storage": {"root": storage},
         }
     )
 
-    CONFIG.update(batch_dict)
-    tap = TapRawMysql(CONFIG)
+    CONFIG = dict(streams.TEST_DATE_TYPE_STREAM, **batch_dict)
+    tap = tap_factory(CONFIG)
 
-    for _, stream in tap.streams.items():
+    for stream in tap.streams.values():
         batches = list(
             stream.get_batches(batch_config=stream.get_batch_config(stream.config))
         )
@@ -163,48 +269,125 @@ def test_batch_type():
         _, files = batches[0]
 
         assert len(files) == 1
-        p = urlparse(files[0])
-        batchfile = os.path.abspath(os.path.join(p.netloc, p.path))
-
-        result_list = list()
-        with open(batchfile, "rb") as f:
-            with gzip.GzipFile(fileobj=f, mode="rb") as gz:
-                for line in gz:
-                    result_list.append(json.loads(line))
-
-        assert result_list[0] == {
-            'timestamp_col': '2023-07-24T01:12:34+00:00',
-            'date_col': '2023-07-24T00:00:00+00:00',
-            'datetime_col': '2023-07-24T01:12:34+00:00',
-            'time_col': '1970-01-01T01:12:34+00:00'
-        }
+        result_list = read_batch_file(files[0])
+
+        assert result_list[:5] == EXPECTED_BATCH
+
+
+# An incremental copy of the date-type stream, keyed on its row number.
+INCREMENTAL_DATE_TYPE_STREAM = dict(
+    streams.TEST_DATE_TYPE_STREAM["streams"][0],
+    sql="SELECT num, timestamp_col, date_col, datetime_col, time_col "
+        "FROM test_date_type "
+        "WHERE num > :rep_key_val "
+        "ORDER BY num",
+    columns=[{"name": "num", "type": "int"}]
+    + streams.TEST_DATE_TYPE_STREAM["streams"][0]["columns"],
+    replication_key="num",
+    replication_key_value_start=0,
+)
+
+
+@pytest.mark.parametrize(
+    "stream_config, expected",
+    [
+        (streams.TEST_DATE_TYPE_STREAM["streams"][0], EXPECTED_BATCH),
+        (
+            INCREMENTAL_DATE_TYPE_STREAM,
+            [dict(record, num=num) for num, record in enumerate(EXPECTED_BATCH, 1)],
+        ),
+    ],
+    ids=["overlap", "replication_key"],
+)
+def test_multiple_batches(tap_factory, tmp_path, monkeypatch, stream_config, expected):
+    """Records are split into ordered batches of `batch_size` records."""
+    # Flush to the compressor on every record, not only once per 1024.
+    monkeypatch.setattr(client, "BATCH_WRITE_ROWS", 1)
 
-        assert result_list[1] == {
-            'timestamp_col': '2023-07-24T01:12:34+00:00',
-            'date_col': None,
-            'datetime_col': None,
-            'time_col': None
+    batch_dict = dict(
+        batch_size=2,
+        batch_config={
+            "encoding": {"format": "jsonl", "compression": "gzip"},
+            "storage": {"root": str(tmp_path)},
         }
+    )
+
+    CONFIG = dict(streams.TEST_DATE_TYPE_STREAM, streams=[stream_config], **batch_dict)
+    tap = tap_factory(CONFIG)
+
+    assert len(tap.streams) == 1
+    stream = next(iter(tap.streams.values()))
+
+    batches = list(
+        stream.get_batches(batch_config=stream.get_batch_config(stream.config))
+    )
+
+    assert len(batches) == 3
+    assert all(len(files) == 1 for _, files in batches)
+
+    result_list = [
+        record for _, files in batches for record in read_batch_file(files[0])
+    ]
+    assert result_list == expected
 
-        assert result_list[2] == {
-            'timestamp_col': None,
-            'date_col': '2023-07-24T00:00:00+00:00',
-            'datetime_col': None,
-            'time_col': None
-        }
 
-        assert result_list[3] == {
-            'timestamp_col': None,
-            'date_col': None,
-            'datetime_col': '2023-07-24T01:12:34+00:00',
-            'time_col': None
+def test_batches_closed_early(tap_factory, tmp_path):
+    """Closing the batch generator stops the background record producer."""
+    batch_dict = dict(
+        batch_size=2,
+        batch_config={
+            "encoding": {"format": "jsonl", "compression": "gzip"},
+            "storage": {"root": str(tmp_path)},
         }
+    )
 
-        assert result_list[4] == {
-            'timestamp_col': None,
-            'date_col': None,
-            'datetime_col': None,
-            'time_col': '1970-01-01T01:12:34+00:00'
+    CONFIG = dict(streams.TEST_DATE_TYPE_STREAM, **batch_dict)
+    tap = tap_factory(CONFIG)
+
+    assert len(tap.streams) == 1
+    stream = next(iter(tap.streams.values()))
+
+    threads = set(threading.enumerate())
+    batches = stream.get_batches(batch_config=stream.get_batch_config(stream.config))
+
+    _, files = next(batches)
+    assert read_batch_file(files[0]) == EXPECTED_BATCH[:2]
+
+    batches.close()
+    assert set(threading.enumerate()) <= threads
+
+
+def test_parquet_integer_type(tap_factory, tmp_path):
+    """Integers keep their full signed and unsigned BIGINT range in Parquet."""
+    batch_dict = dict(
+        batch_size=10000,
+        batch_config={
+            "encoding": {"format": "parquet", "compression": "zstd"},
+            "storage": {"root": str(tmp_path)},
         }
+    )
+
+    CONFIG = dict(streams.TEST_INTEGER_TYPE_STREAM, **batch_dict)
+    tap = tap_factory(CONFIG)
+
+    for stream in tap.streams.values():
+        batches = list(
+            stream.get_batches(batch_config=stream.get_batch_config(stream.config))
+        )
+
+        assert len(batches) == 1
+
+        _, files = batches[0]
+
+        assert len(files) == 1
+        result_list = read_batch_file(files[0])
+
+        arrow_schema = pyarrow.parquet.read_schema(url2pathname(urlparse(files[0]).path))
+        assert arrow_schema.field("bigint_col").type == pyarrow.int64()
+        assert arrow_schema.field("bigint_unsigned_col").type == pyarrow.uint64()
 
-    shutil.rmtree(storage)
+        assert len(result_list) == 7
+        assert result_list[0]['bigint_col'] == -9223372036854775808
+        assert result_list[1]['bigint_col'] == 9223372036854775807
+        assert result_list[1]['bigint_unsigned_col'] == 18446744073709551615
+        assert result_list[2]['bigint_unsigned_col'] is None